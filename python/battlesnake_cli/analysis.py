@@ -0,0 +1,274 @@
+"""Bulk analytics over archived game records using columnar NumPy arrays.
+
+Requires NumPy (`pip install numpy`). Each archive file is parsed once into arrays and cached as .npz
+in .cache/analyze, so later runs only read the arrays of new or changed files.
+"""
+
+from __future__ import annotations
+
+import json
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .archive import CAUSES
+from .config import ANALYZE_CACHE_DIR
+
+# Bump when the parsed columns change, so older caches are rebuilt
+CACHE_FORMAT = 2
+_COLUMNS = ("turns", "winner", "game", "name", "start_x", "start_y", "death", "cause")
+
+
+@dataclass
+class GameTable:
+    """Game records as columns: one row per game and one row per snake in a game.
+
+    Snakes are told apart by version: names holds "name (version)", or the bare name for records written
+    before versions were stored.
+    """
+
+    names: list[str]
+    # Per game
+    turns: np.ndarray
+    winner: np.ndarray  # index into names, -1 for no winner
+    # Per snake in a game, grouped by game
+    game: np.ndarray  # index into the per-game arrays
+    name: np.ndarray
+    start_x: np.ndarray
+    start_y: np.ndarray
+    death: np.ndarray  # turn eliminated, -1 if survived
+    cause: np.ndarray  # index into CAUSES, -1 if survived
+
+    @property
+    def num_games(self) -> int:
+        return len(self.turns)
+
+    @property
+    def won(self) -> np.ndarray:
+        """Per snake row: whether that snake won its game."""
+        return self.winner[self.game] == self.name
+
+
+def _label(snake: dict) -> str:
+    return f"{snake['n']} ({snake['v']})" if snake.get("v") else snake["n"]
+
+
+def _winner(record: dict) -> str | None:
+    """Label of the winner. The winner is a survivor, which matters when snakes in the game share a name."""
+    if not record["w"]:
+        return None
+    candidates = [s for s in record["s"] if s["n"] == record["w"]]
+    if not candidates:
+        return record["w"]
+    return _label(next((s for s in candidates if s["d"] is None), candidates[0]))
+
+
+def _parse(path: Path) -> GameTable:
+    names: dict[str, int] = {}
+    turns, winner = array("i"), array("i")
+    game, name, death = array("i"), array("i"), array("i")
+    start_x, start_y, cause = array("h"), array("h"), array("b")
+    cause_codes = {c: i for i, c in enumerate(CAUSES)}
+
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            g = len(turns)
+            turns.append(record["t"])
+            won_by = _winner(record)
+            winner.append(names.setdefault(won_by, len(names)) if won_by else -1)
+            for s in record["s"]:
+                game.append(g)
+                name.append(names.setdefault(_label(s), len(names)))
+                start_x.append(s["x"])
+                start_y.append(s["y"])
+                death.append(-1 if s["d"] is None else s["d"])
+                cause.append(cause_codes.get(s["c"], -1))
+
+    return GameTable(
+        names=list(names),
+        turns=np.frombuffer(turns, dtype=np.int32),
+        winner=np.frombuffer(winner, dtype=np.int32),
+        game=np.frombuffer(game, dtype=np.int32),
+        name=np.frombuffer(name, dtype=np.int32),
+        start_x=np.frombuffer(start_x, dtype=np.int16),
+        start_y=np.frombuffer(start_y, dtype=np.int16),
+        death=np.frombuffer(death, dtype=np.int32),
+        cause=np.frombuffer(cause, dtype=np.int8),
+    )
+
+
+def load_archive(path: Path, cache_dir: Path = ANALYZE_CACHE_DIR) -> GameTable:
+    """Load one archive file, using its cached arrays if the file has not changed since.
+
+    Raises OSError if the file cannot be read and KeyError if it holds records of another format.
+    """
+    stat = path.stat()
+    cache_path = cache_dir / f"{path.name}.npz"
+    stamp = np.array([stat.st_size, stat.st_mtime_ns, CACHE_FORMAT], dtype=np.int64)
+
+    try:
+        with np.load(cache_path) as data:
+            if np.array_equal(data["stamp"], stamp):
+                return GameTable(names=[str(n) for n in data["names"]], **{k: data[k] for k in _COLUMNS})
+    except (OSError, ValueError, KeyError):
+        # Missing or unreadable cache: parse the archive again
+        pass
+
+    table = _parse(path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    columns = {k: getattr(table, k) for k in _COLUMNS}
+    np.savez(cache_path, stamp=stamp, names=np.array(table.names, dtype=str), **columns)
+    return table
+
+
+def load_tables(paths: list[Path]) -> GameTable:
+    """Load and concatenate archives, mapping snake labels onto one shared list."""
+    return merge_tables([load_archive(path) for path in paths])
+
+
+def merge_tables(tables: list[GameTable]) -> GameTable:
+    """Concatenate tables, mapping snake labels onto one shared list."""
+    names: dict[str, int] = {}
+    parts: list[GameTable] = []
+    offset = 0
+    for table in tables:
+        remap = np.array([names.setdefault(n, len(names)) for n in table.names] + [-1], dtype=np.int32)
+        # -1 (no winner) indexes the trailing -1 of remap
+        table.winner = remap[table.winner]
+        table.name = remap[table.name]
+        table.game = table.game + offset
+        offset += table.num_games
+        parts.append(table)
+
+    if not parts:
+        empty = np.zeros(0, dtype=np.int32)
+        return GameTable([], empty, empty, empty, empty, empty, empty, empty, empty)
+    return GameTable(names=list(names), **{k: np.concatenate([getattr(t, k) for t in parts]) for k in _COLUMNS})
+
+
+def win_counts(table: GameTable) -> tuple[np.ndarray, np.ndarray]:
+    """Games played and games won per snake."""
+    n = len(table.names)
+    return np.bincount(table.name, minlength=n), np.bincount(table.name[table.won], minlength=n)
+
+
+def death_causes(table: GameTable) -> np.ndarray:
+    """Matrix [name, cause] of elimination counts."""
+    n, c = len(table.names), len(CAUSES)
+    mask = table.cause >= 0
+    keys = table.name[mask].astype(np.int64) * c + table.cause[mask]
+    return np.bincount(keys, minlength=n * c).reshape(n, c)
+
+
+def turn_histogram(table: GameTable, bucket: int) -> np.ndarray:
+    """Number of games per game-length bucket of `bucket` turns."""
+    return np.bincount(table.turns // bucket) if table.num_games else np.zeros(0, dtype=np.int64)
+
+
+def win_rate_by_turn_bucket(table: GameTable, bucket: int) -> tuple[np.ndarray, np.ndarray]:
+    """Matrices [name, bucket] of games played and won, by length of the game."""
+    n = len(table.names)
+    buckets = int(table.turns.max()) // bucket + 1 if table.num_games else 0
+    keys = table.name.astype(np.int64) * buckets + table.turns[table.game] // bucket
+    games = np.bincount(keys, minlength=n * buckets).reshape(n, buckets)
+    wins = np.bincount(keys[table.won], minlength=n * buckets).reshape(n, buckets)
+    return games, wins
+
+
+def win_rate_by_start(table: GameTable) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Start positions (as [position, (x, y)]) and matrices [name, position] of games played and won."""
+    n = len(table.names)
+    # Encode (x, y) as one integer: np.unique is much faster on 1-D arrays than with axis=0
+    stride = int(table.start_y.max()) + 1 if len(table.start_y) else 1
+    codes, pos_index = np.unique(table.start_x.astype(np.int64) * stride + table.start_y, return_inverse=True)
+    positions = np.stack([codes // stride, codes % stride], axis=1)
+    p = len(positions)
+    keys = table.name.astype(np.int64) * p + pos_index
+    games = np.bincount(keys, minlength=n * p).reshape(n, p)
+    wins = np.bincount(keys[table.won], minlength=n * p).reshape(n, p)
+    return positions, games, wins
+
+
+def head_to_head(table: GameTable) -> tuple[np.ndarray, np.ndarray]:
+    """Matrices [a, b] of games where a and b met and games where a outlasted b.
+
+    Survivors rank above every eliminated snake, and the winner above other survivors.
+    """
+    n = len(table.names)
+    survival = np.where(table.death < 0, table.turns[table.game] + 1, table.death).astype(np.int64)
+    survival += table.won
+
+    met = np.zeros(n * n, dtype=np.int64)
+    beat = np.zeros(n * n, dtype=np.int64)
+    # Rows of a game are adjacent, so every pair in a game is (i, i + d) for some small d
+    max_snakes = int(np.bincount(table.game).max()) if len(table.game) else 0
+    for d in range(1, max_snakes):
+        a = np.nonzero(table.game[:-d] == table.game[d:])[0]
+        b = a + d
+        for x, y in ((a, b), (b, a)):
+            keys = table.name[x].astype(np.int64) * n + table.name[y]
+            met += np.bincount(keys, minlength=n * n)
+            beat += np.bincount(keys[survival[x] > survival[y]], minlength=n * n)
+    return met.reshape(n, n), beat.reshape(n, n)
+
+
+def _pct(num: np.ndarray | int, den: np.ndarray | int) -> str:
+    return f"{100 * num / den:.1f}%" if den else "-"
+
+
+def report(table: GameTable, bucket: int) -> list[str]:
+    """Human-readable summary of all aggregates."""
+    names = table.names
+    width = max(len(n) for n in names) + 2
+    lines = [f"=== {table.num_games} games, {len(names)} snakes ==="]
+
+    games, wins = win_counts(table)
+    lines.append("\nWin rates:")
+    for i in np.argsort(-wins / np.maximum(games, 1)):
+        lines.append(f"  {names[i]:<{width}} {wins[i]:>7} / {games[i]:<7} {_pct(wins[i], games[i]):>7}")
+
+    causes = death_causes(table)
+    lines.append("\nElimination causes (share of games played):")
+    lines.append(f"  {'':<{width}}" + "".join(f"{c:>15}" for c in CAUSES))
+    for i, name in enumerate(names):
+        lines.append(f"  {name:<{width}}" + "".join(f"{_pct(n, games[i]):>15}" for n in causes[i]))
+
+    hist = turn_histogram(table, bucket)
+    p10, p50, p90 = np.percentile(table.turns, [10, 50, 90])
+    lines.append(
+        f"\nGame length: mean {table.turns.mean():.1f}, p10 {p10:.0f}, median {p50:.0f}, p90 {p90:.0f}, "
+        f"max {table.turns.max()} turns"
+    )
+    for b, count in enumerate(hist):
+        if count:
+            share = _pct(count, table.num_games)
+            lines.append(f"  {b * bucket:>5}-{(b + 1) * bucket - 1:<5} {count:>8} games ({share})")
+
+    bucket_games, bucket_wins = win_rate_by_turn_bucket(table, bucket)
+    used = np.nonzero(bucket_games.sum(axis=0))[0]
+    lines.append("\nWin rate by game length:")
+    lines.append(f"  {'':<{width}}" + "".join(f"{f'{b * bucket}-{(b + 1) * bucket - 1}':>10}" for b in used))
+    for i, name in enumerate(names):
+        lines.append(f"  {name:<{width}}" + "".join(f"{_pct(bucket_wins[i, b], bucket_games[i, b]):>10}" for b in used))
+
+    positions, start_games, start_wins = win_rate_by_start(table)
+    lines.append("\nWin rate by starting position:")
+    lines.append(f"  {'':<{width}}" + "".join(f"{f'({x},{y})':>10}" for x, y in positions))
+    for i, name in enumerate(names):
+        rates = (_pct(start_wins[i, p], start_games[i, p]) for p in range(len(positions)))
+        lines.append(f"  {name:<{width}}" + "".join(f"{rate:>10}" for rate in rates))
+
+    met, beat = head_to_head(table)
+    # Labels are too long for column headers, so columns are numbered after the rows
+    lines.append("\nHead to head (row outlasted column):")
+    lines.append(f"  {'':<{width + 5}}" + "".join(f"{f'[{j + 1}]':>8}" for j in range(len(names))))
+    for i, name in enumerate(names):
+        rates = (_pct(beat[i, j], met[i, j]) for j in range(len(names)))
+        lines.append(f"  {f'[{i + 1}]':>4} {name:<{width}}" + "".join(f"{rate:>8}" for rate in rates))
+    return lines
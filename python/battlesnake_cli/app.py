@@ -4,12 +4,29 @@ from __future__ import annotations
 
 import cmd
 import readline
+import time
 
+from .archive import GameArchive
 from .binary import setup_battlesnake
-from .config import DEFAULT_TEST_GAMES, MAX_SNAKES
+from .concurrency import ConcurrencyController
+from .config import (
+    ANALYZE_TURN_BUCKET,
+    AUTO_LATENCY_FRACTION,
+    DEFAULT_TEST_GAMES,
+    GAME_TIMEOUT,
+    LOADTEST_MAX_CONCURRENCY,
+    MAX_SNAKES,
+    RESULTS_DIR,
+)
 from .game_runner import GameRunner
-from .models import GameResult
+from .jobs import JobScheduler
+from .loadtest import run_load_test
+from .models import Job, LoadStage
+from .profiler import SnakeProfiler
 from .snake_manager import SnakeManager
+from .supervisor import SnakeSupervisor
+
+START_FLAGS = {"--proxy", "--deterministic", "--profile"}
 
 
 class BattlesnakeCLI(cmd.Cmd):
@@ -21,8 +38,14 @@ class BattlesnakeCLI(cmd.Cmd):
     def __init__(self):
         super().__init__()
         self.manager = SnakeManager()
+        self.supervisor = SnakeSupervisor(self.manager)
+        self.supervisor.start()
         binary_path = setup_battlesnake()
         self.runner = GameRunner(binary_path)
+        self.profiler = SnakeProfiler()
+        self.scheduler = JobScheduler(
+            self.runner, on_finish=self._job_finished, before_game=lambda job: self.profiler.arm(job.snakes)
+        )
         print()
 
     # Aliases
@@ -72,8 +95,13 @@ class BattlesnakeCLI(cmd.Cmd):
 
     # Commands
     def do_start(self, arg: str) -> None:
-        """Start snake: start [folder] [index]"""
-        tokens = arg.split()
+        """Start snake: start [folder] [index] [--proxy] [--deterministic] [--profile]"""
+        tokens = [t for t in arg.split() if not t.startswith("--")]
+        flags = {t for t in arg.split() if t.startswith("--")}
+        unknown = flags - START_FLAGS
+        if unknown:
+            print(f"Error: unknown option {sorted(unknown)[0]} (available: {', '.join(sorted(START_FLAGS))})\n")
+            return
         if len(tokens) != 2:
             print("Error: incorrect amount of args\n")
             return
@@ -89,9 +117,21 @@ class BattlesnakeCLI(cmd.Cmd):
             print(f"Error: incorrect index (use 1-{MAX_SNAKES})\n")
             return
 
-        snake = self.manager.start(snake_name, snake_ind)
+        snake = self.manager.start(
+            snake_name,
+            snake_ind,
+            proxy="--proxy" in flags,
+            deterministic="--deterministic" in flags,
+            profile="--profile" in flags,
+        )
         if snake:
-            print(f"Snake {snake_name} is active as Snake {snake_ind + 1}\n")
+            print(f"Snake {snake_name} is active as Snake {snake_ind + 1}")
+            if snake.proxy:
+                cache = ", caching moves" if snake.proxy.cache is not None else ""
+                print(f"    proxied via port {snake.proxy.port}{cache}, logging to {snake.proxy.log_path}")
+            if snake.profile_path:
+                print("    profiling during tests")
+            print()
         else:
             print(f"Unable to start snake {snake_name}\n")
 
@@ -164,6 +204,18 @@ class BattlesnakeCLI(cmd.Cmd):
         print("Snakes currently running:")
         for i, snake in self.manager.list_active():
             print(f"    - {i + 1} : {snake.name} ({snake.proc})")
+            if snake.failed:
+                print(f"        failed after {snake.restarts} restarts")
+            elif snake.restarts:
+                print(f"        restarted {snake.restarts} times")
+            if snake.proxy and snake.proxy.cache is not None:
+                cache = snake.proxy.cache
+                print(
+                    f"        proxy port {snake.proxy.port}, "
+                    f"cache {len(cache)} states, {cache.hits} hits / {cache.misses} misses"
+                )
+            elif snake.proxy:
+                print(f"        proxy port {snake.proxy.port}")
         print()
 
     def do_game(self, arg: str) -> None:
@@ -264,8 +316,17 @@ class BattlesnakeCLI(cmd.Cmd):
                 print(f"    - {idx + 1} : {snake.name}")
 
     def do_test(self, arg: str) -> None:
-        """Run test games: test [count] [indices...] [num_games?]"""
+        """Queue test games: test [count] [indices...] [num_games?] [--seed N]"""
         tokens = arg.split()
+        seed = None
+        if "--seed" in tokens:
+            i = tokens.index("--seed")
+            try:
+                seed = int(tokens[i + 1])
+            except (IndexError, ValueError):
+                print("Error: --seed needs a number\n")
+                return
+            del tokens[i : i + 2]
         if len(tokens) < 1:
             print("Error: number of snakes not provided\n")
             return
@@ -312,6 +373,9 @@ class BattlesnakeCLI(cmd.Cmd):
             except ValueError:
                 print("Error: invalid number of games\n")
                 return
+            if num_games < 1:
+                print("Error: invalid number of games\n")
+                return
         else:
             print(f"Error: expected {amount} indices (and optional game count)\n")
             return
@@ -325,28 +389,242 @@ class BattlesnakeCLI(cmd.Cmd):
                 return
             snakes.append(snake)
 
-        print(f"Running {num_games} games...\n")
+        self.profiler.begin(snakes)
+        archive_name = f"{time.strftime('%Y%m%d-%H%M%S')}_{'_vs_'.join(s.name for s in snakes)}.jsonl"
+        job = self.scheduler.submit(snakes, num_games, archive=GameArchive(RESULTS_DIR / archive_name), seed=seed)
+        names = " vs ".join(s.name for s in snakes)
+        seeds = f" (seeds {seed}-{seed + num_games - 1})" if seed is not None else ""
+        print(f"Job {job.id} queued: {num_games} games of {names}{seeds}")
+        print(f"    (use job {job.id} to see progress, job {job.id} -f to follow, cancel {job.id} to stop)\n")
+
+    def do_jobs(self, arg: str) -> None:
+        """List test jobs."""
+        jobs = self.scheduler.list_jobs()
+        if not jobs:
+            print("No jobs\n")
+            return
+        mode = ", auto" if self.scheduler.controller else ""
+        print(f"Jobs (up to {self.scheduler.max_concurrency} games at a time{mode}):")
+        for job in jobs:
+            names = " vs ".join(s.name for s in job.snakes)
+            print(f"    - {job.id} : {job.status:<9} {job.results.total_games}/{job.num_games} games  {names}")
+        print()
+
+    def do_job(self, arg: str) -> None:
+        """Show job progress: job [id] [-f]"""
+        tokens = arg.split()
+        follow = "-f" in tokens
+        tokens = [t for t in tokens if t != "-f"]
+        if len(tokens) != 1:
+            print("Error: incorrect amount of args\n")
+            return
+        job = self._get_job(tokens[0])
+        if job is None:
+            return
+
+        if follow:
+            print(f"Following job {job.id} (Ctrl+C to stop following, the job keeps running)\n")
+            shown = 0
+            try:
+                while True:
+                    done = job.finished.wait(0.5)
+                    lines, shown = _format_games(job, shown)
+                    for line in lines:
+                        print(line)
+                    if done and shown >= job.played:
+                        break
+            except KeyboardInterrupt:
+                print("\n")
+                return
+        else:
+            for line in _format_games(job, max(0, job.played - 10))[0]:
+                print(line)
+
+        self._print_results(job)
 
-        def progress(game_num: int, total: int, result: GameResult, wins: dict[str, int]) -> None:
-            winner_str = f"{result.winner} wins" if result.winner else "Tie"
-            summary = ", ".join(f"{name}: {count}" for name, count in wins.items())
-            game_num_width = len(str(total))
-            left = f"Game {game_num:>{game_num_width}}/{total}: {winner_str} ({result.turns} turns)"
-            print(f"{left:<45} | {summary}")
+    def do_cancel(self, arg: str) -> None:
+        """Cancel job: cancel [id]"""
+        tokens = arg.split()
+        if len(tokens) != 1:
+            print("Error: incorrect amount of args\n")
+            return
+        job = self._get_job(tokens[0])
+        if job is None:
+            return
+        if self.scheduler.cancel(job.id):
+            print(f"Job {job.id} cancelled\n")
+        else:
+            print(f"Job {job.id} is already {job.status}\n")
 
-        results = self.runner.run_test(snakes, num_games, progress_callback=progress)
+    def do_concurrency(self, arg: str) -> None:
+        """Set games run at once: concurrency [number or auto]"""
+        tokens = arg.split()
+        if not tokens:
+            mode = " (auto)" if self.scheduler.controller else ""
+            print(f"Running up to {self.scheduler.max_concurrency} games at a time{mode}\n")
+            return
+        if len(tokens) != 1:
+            print("Error: incorrect amount of args\n")
+            return
+
+        if tokens[0] == "auto":
+            controller = ConcurrencyController(initial=self.scheduler.max_concurrency)
+            self.scheduler.set_concurrency(controller.limit, controller=controller)
+            print(
+                f"Concurrency is adjusted automatically (1-{controller.max_concurrency} games, "
+                f"keeping p99 move latency under {controller.target_ms:.0f} ms)\n"
+            )
+            return
+
+        try:
+            limit = int(tokens[0])
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            print("Error: expected a positive number or auto\n")
+            return
+        self.scheduler.set_concurrency(limit)
+        print(f"Running up to {limit} games at a time\n")
 
-        # Final summary
-        print(f"\n=== Results ({num_games} games) ===")
+    def _get_job(self, token: str) -> Job | None:
+        try:
+            job = self.scheduler.get(int(token))
+        except ValueError:
+            job = None
+        if job is None:
+            print(f"Error: no job {token}\n")
+        return job
+
+    def _job_finished(self, job: Job) -> None:
+        job.report = self.profiler.end(job.snakes, sum(job.results.turns_list))
+        if job.status != "cancelled":
+            print(f"\nJob {job.id} {job.status}: {_wins_summary(job)} (use job {job.id} for results)")
+        for line in job.report:
+            print(line)
+
+    def _print_results(self, job: Job) -> None:
+        results = job.results
+        played = results.total_games
+        if job.status == "aborted":
+            print(f"\nTest aborted after {played} of {job.num_games} games (a snake crashed repeatedly or was stopped)")
+        elif job.active:
+            print(f"\nJob {job.id} {job.status}: {played} of {job.num_games} games played")
+        print(f"\n=== Results ({played} games) ===")
         for name, count in results.wins.items():
-            pct = (count / num_games) * 100
+            pct = (count / played) * 100 if played else 0.0
             left = f"  {name}:"
             print(f"{left:<15} {count} wins ({pct:.1f}%)")
         if results.ties > 0:
-            pct = (results.ties / num_games) * 100
+            pct = (results.ties / played) * 100
             left = "  Ties:"
             print(f"{left:<15} {results.ties}      ({pct:.1f}%)")
-        print(f"  Avg turns: {results.avg_turns:.1f}\n")
+        if results.invalid_games > 0:
+            print(f"  Invalid games: {results.invalid_games} (replayed)")
+        print(f"  Avg turns: {results.avg_turns:.1f}")
+        log = results.concurrency_log
+        steps = ", ".join(f"{limit} at {t:.0f}s" for t, limit in log[-8:])
+        print(f"  Concurrency: {'..., ' if len(log) > 8 else ''}{steps}\n")
+        if job.report:
+            for line in job.report:
+                print(line)
+            print()
+
+    def do_analyze(self, arg: str) -> None:
+        """Analyze archived games: analyze [file pattern?]"""
+        tokens = arg.split()
+        if len(tokens) > 1:
+            print("Error: incorrect amount of args\n")
+            return
+
+        try:
+            from .analysis import load_archive, merge_tables, report
+        except ImportError:
+            print("Error: analyze requires NumPy (pip install numpy)\n")
+            return
+
+        pattern = tokens[0] if tokens else "*.jsonl"
+        paths = sorted(RESULTS_DIR.glob(pattern)) if RESULTS_DIR.is_dir() else []
+        paths = [p for p in paths if p.is_file() and p.suffix == ".jsonl"]
+        if not paths:
+            print(f"No archived games matching {pattern} in {RESULTS_DIR}\n")
+            return
+
+        print(f"Loading {len(paths)} archive files...\n")
+        tables = []
+        for path in paths:
+            try:
+                tables.append(load_archive(path))
+            except OSError as e:
+                print(f"Error: could not read {path.name}: {e}")
+            except KeyError as e:
+                print(f"Error: {path.name} is not a game archive (missing {e})")
+        table = merge_tables(tables)
+        if not table.num_games:
+            print("No games found\n")
+            return
+        for line in report(table, ANALYZE_TURN_BUCKET):
+            print(line)
+        print()
+
+    def do_loadtest(self, arg: str) -> None:
+        """Find snake capacity: loadtest [index] [max concurrency?]"""
+        tokens = arg.split()
+        if len(tokens) not in (1, 2):
+            print("Error: incorrect amount of args\n")
+            return
+
+        try:
+            snake_ind = int(tokens[0]) - 1
+        except ValueError:
+            print(f"Error: incorrect index (use 1-{MAX_SNAKES})\n")
+            return
+
+        snake = self.manager.get(snake_ind)
+        if not snake:
+            print(f"Error: snake {tokens[0]} not active\n")
+            return
+
+        # Games of a running test would skew the measurements, and the load would push them past the timeout
+        busy = [job.id for job in self.scheduler.list_jobs() if job.active and any(s is snake for s in job.snakes)]
+        if busy:
+            ids = ", ".join(str(i) for i in busy)
+            print(f"Error: {snake.name} is playing in job {ids}, wait for it to finish or cancel it first\n")
+            return
+
+        max_concurrency = LOADTEST_MAX_CONCURRENCY
+        if len(tokens) == 2:
+            try:
+                max_concurrency = int(tokens[1])
+            except ValueError:
+                print("Error: invalid max concurrency\n")
+                return
+            if max_concurrency < 1:
+                print("Error: invalid max concurrency\n")
+                return
+
+        print(f"Load testing {snake.name} (timeout {GAME_TIMEOUT} ms)...\n")
+        print(f"{'Concurrent':>10} {'Moves/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'Timeouts':>9} {'Errors':>7}")
+
+        def progress(stage: LoadStage) -> None:
+            print(
+                f"{stage.concurrency:>10} {stage.throughput:>9.1f} {stage.p50_ms:>8.1f} {stage.p99_ms:>8.1f} "
+                f"{stage.timeouts:>9} {stage.errors:>7}"
+            )
+
+        results = run_load_test(snake, max_concurrency=max_concurrency, progress_callback=progress)
+
+        saturation = results.saturation
+        limited_by = results.limited_by
+        if limited_by is None:
+            print(f"\n{snake.name} kept p99 under {GAME_TIMEOUT} ms up to {saturation} concurrent games (max tested)\n")
+        elif limited_by == "errors" and saturation is None:
+            print(f"\n{snake.name} fails requests even with a single game\n")
+        elif limited_by == "errors":
+            print(f"\n{snake.name} starts failing requests above {saturation} concurrent games\n")
+        elif saturation is None:
+            print(f"\n{snake.name} misses the {GAME_TIMEOUT} ms timeout even with a single game\n")
+        else:
+            print(f"\n{snake.name} saturates above {saturation} concurrent games (p99 under {GAME_TIMEOUT} ms)\n")
 
     def do_exit(self, arg: str) -> bool:
         """Stop all snakes and exit."""
@@ -361,6 +639,8 @@ class BattlesnakeCLI(cmd.Cmd):
 
     def _cleanup(self) -> None:
         """Stop all snakes before exit."""
+        self.scheduler.shutdown()
+        self.supervisor.stop()
         for i, name, success in self.manager.stop_all():
             if success:
                 print(f"Stopped snake {i + 1} : {name}")
@@ -370,6 +650,8 @@ class BattlesnakeCLI(cmd.Cmd):
     # Completers
     def complete_start(self, text: str, line: str, begidx: int, endidx: int) -> list[str]:
         tokens = line.split()
+        if text.startswith("-"):
+            return [f for f in sorted(START_FLAGS) if f.startswith(text)]
         if len(tokens) <= 2 and not line.endswith(" "):
             folders = self.manager.get_snake_folders()
             return [f for f in folders if f.startswith(text)]
@@ -411,7 +693,10 @@ class BattlesnakeCLI(cmd.Cmd):
             f"s | start | run [folder name] [index]\n"
             f"    - starts the snake from the given folder in the snakes/ directory as Snake <index>\n"
             f"      (available indices: 1-{MAX_SNAKES})\n"
-            f"      (e.g. start BobSnake 1 - starts the snake in the snakes/BobSnake/ folder as Snake 1)"
+            f"      (e.g. start BobSnake 1 - starts the snake in the snakes/BobSnake/ folder as Snake 1)\n"
+            f"      (--proxy - record all requests/responses with timings into logs/)\n"
+            f"      (--deterministic - like --proxy, and answer repeated game states from a cache)\n"
+            f"      (--profile - sample a Python snake during tests, write a flamegraph file into profiles/)"
         )
         print(
             f"a | startall [folder name, folder name, ...]\n"
@@ -432,11 +717,57 @@ class BattlesnakeCLI(cmd.Cmd):
             "t | test [number of snakes] [index, index, ...] [num games?]\n"
             "    - run multiple games (default 100) and show win statistics\n"
             "      (e.g. test 2 1 2 - runs 100 games with snakes 1 and 2)\n"
-            "      (e.g. test 2 1 2 50 - runs 50 games)"
+            "      (e.g. test 2 1 2 50 - runs 50 games)\n"
+            "      (--seed N - play games with seeds N, N+1, ... so a rerun replays the same games)\n"
+            "      (runs in the background as a job, games of all jobs share one concurrency budget)"
+        )
+        print("jobs\n    - list test jobs and their progress")
+        print("job [id] [-f]\n    - show results so far of a job (-f - follow games as they finish)")
+        print("cancel [id]\n    - cancel a queued or running job")
+        print(
+            "concurrency [number | auto]\n"
+            "    - show or set how many test games run at once across all jobs\n"
+            "      (auto - adjust it to maximize games/sec while p99 move latency stays under\n"
+            f"       {AUTO_LATENCY_FRACTION:.0%} of the {GAME_TIMEOUT} ms timeout and the CPU is not saturated)"
+        )
+        print(
+            "analyze [file pattern?]\n"
+            "    - win rates, elimination causes, game lengths, win rates by game length and starting position\n"
+            "      and head-to-head matrix over games archived in results/ by test (needs NumPy)\n"
+            "      (e.g. analyze *AlienSnake* - only archives of tests with AlienSnake)"
+        )
+        print(
+            f"loadtest [index] [max concurrency?]\n"
+            f"    - ramp up concurrent /move requests against a snake (up to {LOADTEST_MAX_CONCURRENCY} by default)\n"
+            f"      and report throughput and latency until p99 crosses the {GAME_TIMEOUT} ms timeout"
         )
         print("e | exit\n    - stop all snakes and exit the program")
 
 
+def _wins_summary(job: Job) -> str:
+    return ", ".join(f"{name}: {count}" for name, count in job.results.wins.items())
+
+
+def _format_games(job: Job, start: int) -> tuple[list[str], int]:
+    """One line per finished game in history from sequence number start on, and the next sequence number.
+
+    Only the last JOB_HISTORY_SIZE games are kept, so older ones are skipped.
+    """
+    game_num_width = len(str(job.num_games))
+    lines = []
+    for seq, game_num, winner, turns in job.history.copy():
+        if seq < start:
+            continue
+        start = seq + 1
+        if game_num is None:
+            lines.append("Invalid game (snake crashed), replaying")
+            continue
+        winner_str = f"{winner} wins" if winner else "Tie"
+        left = f"Game {game_num:>{game_num_width}}/{job.num_games}: {winner_str} ({turns} turns)"
+        lines.append(f"{left:<45} | {_wins_summary(job)}")
+    return lines, start
+
+
 def main() -> None:
     """Entry point for the CLI."""
     # Setup readline for better macOS compatibility
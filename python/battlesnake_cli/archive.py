@@ -0,0 +1,117 @@
+"""Compact per-game records of test games, archived as JSON lines in results/."""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .models import Snake
+
+# Elimination causes as stored in records; the index is the code used by analysis.py
+CAUSES = ("out-of-health", "head-to-head", "wall", "collision")
+
+
+def read_game_output(path: Path) -> tuple[dict | None, list[float]]:
+    """Build a game record from a battlesnake `--output` file. Returns (record or None, move latencies in ms).
+
+    The file holds the game info, then one request body per turn, then the result. Record format:
+    {"t": turns, "w": winner name or null, "s": [{"n": name, "x": start x, "y": start y,
+    "d": turn eliminated or null, "c": cause or null}, ...]}. tag_versions() adds "v" to each snake.
+    """
+    snakes: dict[str, dict] = {}
+    latencies: list[float] = []
+    prev = None
+    winner = None
+    try:
+        with open(path) as f:
+            for line in f:
+                data = json.loads(line)
+                if "isDraw" in data:
+                    winner = None if data["isDraw"] else data.get("winnerName") or None
+                    continue
+                if "board" not in data:
+                    continue
+                board = data["board"]
+                if prev is None:
+                    for s in board["snakes"]:
+                        head = s["head"]
+                        snakes[s["id"]] = {"n": s["name"], "x": head["x"], "y": head["y"], "d": None, "c": None}
+                else:
+                    # Each snake reports how long its previous move took
+                    latencies.extend(float(s["latency"]) for s in board["snakes"] if s.get("latency"))
+                    alive = {s["id"] for s in board["snakes"]}
+                    for s in prev["board"]["snakes"]:
+                        if s["id"] not in alive and s["id"] in snakes:
+                            snakes[s["id"]]["d"] = data["turn"]
+                            snakes[s["id"]]["c"] = death_cause(prev["board"], board, s)
+                prev = data
+    except (OSError, ValueError, KeyError):
+        return None, latencies
+    if prev is None:
+        return None, latencies
+    return {"t": prev["turn"], "w": winner, "s": list(snakes.values())}, latencies
+
+
+def tag_versions(record: dict, snakes: list[Snake]) -> None:
+    """Store the version of each snake in record as "v". Snakes sharing a name are matched in order."""
+    versions: dict[str, list[str]] = {}
+    for snake in snakes:
+        versions.setdefault(snake.name, []).append(snake.version)
+    for s in record["s"]:
+        pending = versions.get(s["n"])
+        if pending:
+            s["v"] = pending.pop(0)
+
+
+def death_cause(before: dict, after: dict, snake: dict) -> str:
+    """Infer why snake was eliminated between two consecutive boards.
+
+    Moves are not recorded, so this works backwards from what the snake could have done: with every free
+    in-bounds neighbour available it must have left the board; otherwise it hit a body.
+    """
+    if snake["health"] <= 1:
+        return "out-of-health"
+
+    head = (snake["head"]["x"], snake["head"]["y"])
+    length = len(snake["body"])
+    neck = (snake["body"][1]["x"], snake["body"][1]["y"]) if length > 1 else None
+    x, y = head
+    neighbours = [p for p in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)) if p != neck]
+
+    after_heads = {s["id"]: (s["head"]["x"], s["head"]["y"]) for s in after["snakes"]}
+    for other in before["snakes"]:
+        if other["id"] == snake["id"] or len(other["body"]) < length:
+            continue
+        other_head = after_heads.get(other["id"])
+        if other_head is not None:
+            if other_head in neighbours:
+                return "head-to-head"
+        elif abs(other["head"]["x"] - x) + abs(other["head"]["y"] - y) == 2:
+            # Both eliminated on the same turn with heads one cell apart
+            return "head-to-head"
+
+    occupied = {(p["x"], p["y"]) for s in after["snakes"] for p in s["body"]}
+    # The snake itself is gone from after; its body minus the tail (which moves away) was still in the way
+    occupied.update((p["x"], p["y"]) for p in snake["body"][:-1])
+    in_bounds = [(nx, ny) for nx, ny in neighbours if 0 <= nx < before["width"] and 0 <= ny < before["height"]]
+    if len(in_bounds) < len(neighbours) and not any(p in occupied for p in in_bounds):
+        return "wall"
+    return "collision"
+
+
+class GameArchive:
+    """Appends game records of one test run to a JSON lines file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
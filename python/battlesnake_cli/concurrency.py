@@ -0,0 +1,126 @@
+"""Adaptive control of how many games run at once."""
+
+from __future__ import annotations
+
+import os
+import time
+
+from .config import AUTO_LATENCY_FRACTION, AUTO_MAX_CONCURRENCY, AUTO_MAX_CPU, GAME_TIMEOUT
+from .models import GameResult
+from .stats import percentile
+
+# Games per decision, per game allowed to run at once (more parallel games need more samples)
+GAMES_PER_STEP = 2
+# Increase only while the last increase raised throughput by at least this factor
+MIN_GAIN = 1.05
+# Decisions spent just below the ceiling before probing it again
+PROBE_STEPS = 10
+
+
+class CpuMonitor:
+    """Host CPU utilization (0-1) since the previous call, from /proc/stat or the load average."""
+
+    def __init__(self):
+        self._last = self._read_proc_stat()
+
+    @staticmethod
+    def _read_proc_stat() -> tuple[int, int] | None:
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+        return sum(fields), idle
+
+    def busy(self) -> float | None:
+        current = self._read_proc_stat()
+        if current is not None and self._last is not None:
+            total, idle = current[0] - self._last[0], current[1] - self._last[1]
+            self._last = current
+            return 1 - idle / total if total else None
+        try:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        except (AttributeError, OSError):
+            return None
+
+
+class ConcurrencyController:
+    """Hill-climbs the number of parallel games towards the best games/sec.
+
+    Every few games it looks at p99 move latency and host CPU use. The limit is halved when p99 exceeds
+    AUTO_LATENCY_FRACTION of GAME_TIMEOUT, lowered by one when the CPU is saturated, and raised by one
+    while that still pays off in throughput.
+
+    The lowest limit that exceeded the latency target is kept as a ceiling: increases stop just below it,
+    and only every PROBE_STEPS decisions is the ceiling itself tried again. A probe that meets the target
+    lifts the ceiling; one that does not steps back by one instead of halving.
+    """
+
+    def __init__(
+        self,
+        initial: int = 1,
+        max_concurrency: int = AUTO_MAX_CONCURRENCY,
+        latency_fraction: float = AUTO_LATENCY_FRACTION,
+    ):
+        self.limit = initial
+        self.max_concurrency = max_concurrency
+        self.target_ms = GAME_TIMEOUT * latency_fraction
+        self._cpu = CpuMonitor()
+        self._latencies: list[float] = []
+        self._games = 0
+        self._skip = 0
+        self._step_start = time.monotonic()
+        # Throughput measured at each limit (below the ceiling)
+        self._throughput: dict[int, float] = {}
+        # Lowest limit that exceeded the latency target, and decisions held just below it
+        self._ceiling: int | None = None
+        self._held = 0
+
+    def observe(self, result: GameResult) -> int | None:
+        """Feed a finished game. Returns the new limit when it changes, else None."""
+        if self._skip:
+            # Game was started under the previous limit
+            self._skip -= 1
+            self._step_start = time.monotonic()
+            return None
+        self._games += 1
+        self._latencies.extend(result.turn_latencies)
+        if self._games < GAMES_PER_STEP * self.limit:
+            return None
+
+        now = time.monotonic()
+        throughput = self._games / (now - self._step_start)
+        p99 = percentile(self._latencies, 99)
+        cpu = self._cpu.busy()
+        self._games = 0
+        self._latencies = []
+        self._step_start = now
+        self._throughput[self.limit] = throughput
+        probing = self._ceiling is not None and self.limit >= self._ceiling
+
+        if p99 > self.target_ms:
+            self._ceiling = self.limit if self._ceiling is None else min(self._ceiling, self.limit)
+            # Measurements at or above the ceiling were taken while over the target
+            self._throughput = {k: v for k, v in self._throughput.items() if k < self._ceiling}
+            new_limit = max(1, self.limit - 1 if probing else self.limit // 2)
+        elif cpu is not None and cpu > AUTO_MAX_CPU:
+            new_limit = max(1, self.limit - 1)
+        else:
+            if probing:
+                self._ceiling = None
+            new_limit = self.limit
+            if self.limit < self.max_concurrency and throughput >= self._throughput.get(self.limit - 1, 0) * MIN_GAIN:
+                if self._ceiling is None or self.limit + 1 < self._ceiling:
+                    new_limit = self.limit + 1
+                else:
+                    self._held += 1
+                    if self._held >= PROBE_STEPS:
+                        new_limit = self.limit + 1
+
+        if new_limit == self.limit:
+            return None
+        self._held = 0
+        self._skip = self.limit
+        self.limit = new_limit
+        return new_limit
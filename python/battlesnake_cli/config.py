@@ -1,12 +1,37 @@
 """Configuration constants and paths."""
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path.cwd()
 SNAKES_DIR = BASE_DIR / "snakes"
 BIN_DIR = BASE_DIR / ".bin"
+LOGS_DIR = BASE_DIR / "logs"
+PROFILES_DIR = BASE_DIR / "profiles"
+RESULTS_DIR = BASE_DIR / "results"
+ANALYZE_CACHE_DIR = BASE_DIR / ".cache" / "analyze"
 
 MAX_SNAKES = 8
 BASE_PORT = 8000
 GAME_TIMEOUT = 500
 DEFAULT_TEST_GAMES = 100
+JOB_HISTORY_SIZE = 1000
+JOB_CONCURRENCY = max(1, (os.cpu_count() or 2) // 2)
+AUTO_MAX_CONCURRENCY = 4 * (os.cpu_count() or 1)
+AUTO_LATENCY_FRACTION = 0.5
+AUTO_MAX_CPU = 0.9
+
+LOADTEST_MAX_CONCURRENCY = 64
+LOADTEST_STAGE_SECONDS = 5.0
+
+PROXY_CACHE_SIZE = 50_000
+PROFILE_INTERVAL_MS = 10
+
+SUPERVISOR_INTERVAL = 0.5
+RESTART_BACKOFF = 1.0
+RESTART_BACKOFF_MAX = 30.0
+MAX_RESTARTS = 5
+STOP_TIMEOUT = 5.0
+SNAKE_READY_TIMEOUT = 60.0
+
+ANALYZE_TURN_BUCKET = 50
@@ -2,14 +2,40 @@
 
 from __future__ import annotations
 
+import os
 import re
+import socket
 import subprocess as sp
+import tempfile
+import time
 from pathlib import Path
 
-from .config import DEFAULT_TEST_GAMES, GAME_TIMEOUT
+from .archive import read_game_output, tag_versions
+from .concurrency import ConcurrencyController
+from .config import DEFAULT_TEST_GAMES, GAME_TIMEOUT, SNAKE_READY_TIMEOUT
+from .jobs import JobScheduler
 from .models import GameResult, Snake, TestResults
 
 
+def wait_listening(snake: Snake, timeout: float = SNAKE_READY_TIMEOUT) -> bool:
+    """Wait until snake is running and accepting connections, across supervisor restarts.
+
+    Returns False on timeout or if the snake failed for good.
+    """
+    deadline = time.monotonic() + timeout
+    while not snake.failed:
+        if snake.proc.poll() is None:
+            try:
+                socket.create_connection(("127.0.0.1", snake.port), timeout=1).close()
+                return True
+            except OSError:
+                pass
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.2)
+    return False
+
+
 class GameRunner:
     """Handles battlesnake binary interaction for running games."""
 
@@ -20,7 +46,7 @@ class GameRunner:
         """Build base command with snake names and URLs."""
         cmd = [str(self.binary), "play", "-W", "11", "-H", "11"]
         for snake in snakes:
-            cmd += ["--name", snake.name, "--url", f"http://127.0.0.1:{snake.port}"]
+            cmd += ["--name", snake.name, "--url", snake.url]
         cmd += ["-g", "solo" if len(snakes) == 1 else "standard"]
         return cmd
 
@@ -35,45 +61,82 @@ class GameRunner:
             cmd += ["--browser"]
         sp.Popen(cmd)
 
-    def play_headless(self, snakes: list[Snake]) -> GameResult:
+    def play_headless(self, snakes: list[Snake], seed: int | None = None) -> GameResult:
         """Run single game without browser, return result."""
         cmd = self._build_base_cmd(snakes)
         cmd += ["-t", str(GAME_TIMEOUT)]
-
-        result = sp.run(cmd, capture_output=True, text=True)
+        if seed is not None:
+            cmd += ["-r", str(seed)]
+
+        # Full game output is parsed into a compact record for the results archive
+        fd, output_name = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        output_path = Path(output_name)
+        cmd += ["-o", str(output_path)]
+        start = time.monotonic()
+        try:
+            result = sp.run(cmd, capture_output=True, text=True)
+            duration = time.monotonic() - start
+            record, latencies = read_game_output(output_path)
+        finally:
+            output_path.unlink(missing_ok=True)
+        if record:
+            tag_versions(record, snakes)
 
         # Parse: "Game completed after 123 turns. Snake1 was the winner."
         # Note: battlesnake CLI logs to stderr
         match = re.search(r"Game completed after (\d+) turns\. (.+) was the winner\.", result.stderr)
         if match:
-            return GameResult(winner=match.group(2), turns=int(match.group(1)))
+            return GameResult(
+                winner=match.group(2),
+                turns=int(match.group(1)),
+                record=record,
+                duration=duration,
+                latencies=latencies,
+            )
 
         # No winner (tie or error) - try to get turns at least
         turns_match = re.search(r"Game completed after (\d+) turns", result.stderr)
         turns = int(turns_match.group(1)) if turns_match else 0
-        return GameResult(winner=None, turns=turns)
+        return GameResult(winner=None, turns=turns, record=record, duration=duration, latencies=latencies)
+
+    def wait_ready(self, snakes: list[Snake], timeout: float = SNAKE_READY_TIMEOUT) -> bool:
+        """Wait until every snake is running and accepting connections. Returns False on timeout or failure."""
+        deadline = time.monotonic() + timeout
+        return all(wait_listening(snake, deadline - time.monotonic()) for snake in snakes)
+
+    def play_checked(self, snakes: list[Snake], seed: int | None = None) -> GameResult:
+        """Run a headless game, marking it invalid if any snake crashed or was restarted during it."""
+        if not self.wait_ready(snakes):
+            return GameResult(winner=None, turns=0, valid=False)
+        generations = [s.restarts for s in snakes]
+        result = self.play_headless(snakes, seed)
+        if any(s.proc.poll() is not None for s in snakes) or [s.restarts for s in snakes] != generations:
+            result.valid = False
+        return result
 
     def run_test(
         self,
         snakes: list[Snake],
         num_games: int = DEFAULT_TEST_GAMES,
         progress_callback: callable | None = None,
+        concurrency: int | str = 1,
+        seed: int | None = None,
     ) -> TestResults:
-        """Run multiple games and return aggregated results."""
-        wins: dict[str, int] = {s.name: 0 for s in snakes}
-        turns_list: list[int] = []
-        ties = 0
-
-        for game_num in range(1, num_games + 1):
-            result = self.play_headless(snakes)
-            turns_list.append(result.turns)
-
-            if result.winner:
-                wins[result.winner] = wins.get(result.winner, 0) + 1
-            else:
-                ties += 1
-
-            if progress_callback:
-                progress_callback(game_num, num_games, result, wins)
-
-        return TestResults(wins=wins, ties=ties, total_games=num_games, turns_list=turns_list)
+        """Run multiple games (up to `concurrency` at a time) and return aggregated results.
+
+        With seed, game n is played with seed + n, so the same call replays the same games.
+
+        With concurrency="auto" the number of parallel games adapts to move latency and CPU load
+        (see ConcurrencyController); the chosen values are logged in results.concurrency_log.
+        Games affected by a snake crash are counted as invalid and replayed. The run is aborted if a snake
+        fails permanently or as many games are invalid as were requested.
+        """
+        if concurrency == "auto":
+            scheduler = JobScheduler(self, controller=ConcurrencyController())
+        else:
+            scheduler = JobScheduler(self, max_concurrency=concurrency)
+        job = scheduler.submit(snakes, num_games, progress_callback, seed=seed)
+        job.finished.wait()
+        scheduler.shutdown()
+        return job.results
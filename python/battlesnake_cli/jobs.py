@@ -0,0 +1,217 @@
+"""Background scheduler that runs test games from several jobs under one concurrency budget."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from .archive import GameArchive
+from .config import JOB_CONCURRENCY
+from .models import GameResult, Job, Snake, TestResults
+
+if TYPE_CHECKING:
+    from .concurrency import ConcurrencyController
+    from .game_runner import GameRunner
+
+
+class JobScheduler:
+    """Runs games of submitted jobs on a pool of worker threads, at most max_concurrency at a time.
+
+    Workers take one game at a time from the queued jobs in round-robin order, so concurrent jobs
+    progress at the same rate instead of running one after another. With a controller, the limit
+    follows the controller's decisions as games finish. before_game is called on the worker thread
+    before each game is played.
+    """
+
+    def __init__(
+        self,
+        runner: GameRunner,
+        max_concurrency: int = JOB_CONCURRENCY,
+        on_finish: Callable[[Job], None] | None = None,
+        controller: ConcurrencyController | None = None,
+        before_game: Callable[[Job], None] | None = None,
+    ):
+        self.runner = runner
+        self.max_concurrency = controller.limit if controller else max_concurrency
+        self.controller = controller
+        self.on_finish = on_finish
+        self.before_game = before_game
+        self._running = 0
+        self._jobs: dict[int, Job] = {}
+        self._queue: deque[Job] = deque()
+        self._cond = threading.Condition()
+        self._next_id = 1
+        self._shutdown = False
+        self._workers: list[threading.Thread] = []
+
+    def submit(
+        self,
+        snakes: list[Snake],
+        num_games: int,
+        progress_callback: Callable[[int, int, GameResult, dict[str, int]], None] | None = None,
+        archive: GameArchive | None = None,
+        seed: int | None = None,
+    ) -> Job:
+        """Queue a test of num_games games between snakes. Returns the Job.
+
+        Records of valid games are appended to archive if given. With seed, the games are played with seeds
+        seed, seed + 1, ... (see Job.take_seed). A job of no games is done at once.
+        """
+        results = TestResults(wins={s.name: 0 for s in snakes}, ties=0, total_games=0, turns_list=[])
+        with self._cond:
+            job = Job(
+                id=self._next_id,
+                snakes=snakes,
+                num_games=num_games,
+                results=results,
+                progress_callback=progress_callback,
+                archive=archive,
+                seed=seed,
+            )
+            self._next_id += 1
+            job.results.concurrency_log.append((0.0, self.max_concurrency))
+            self._jobs[job.id] = job
+            if num_games > 0:
+                self._queue.append(job)
+                self._ensure_workers()
+                self._cond.notify_all()
+            else:
+                job.status = "done"
+        if not job.active:
+            self._notify_finished(job)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job. Games already in progress finish but are not counted."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            self._finish(job, "cancelled")
+        self._notify_finished(job)
+        return True
+
+    def set_concurrency(self, limit: int, controller: ConcurrencyController | None = None) -> None:
+        """Change the number of games run at once, or hand control of it to controller."""
+        with self._cond:
+            self.controller = controller
+            self._set_limit(controller.limit if controller else limit)
+
+    def _set_limit(self, limit: int) -> None:
+        """Apply a new limit and log it in active jobs. Caller holds the lock."""
+        if limit == self.max_concurrency:
+            return
+        self.max_concurrency = limit
+        now = time.monotonic()
+        for job in self._queue:
+            job.results.concurrency_log.append((round(now - job.started, 1), limit))
+        self._ensure_workers()
+        self._cond.notify_all()
+
+    def get(self, job_id: int) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def list_jobs(self) -> list[Job]:
+        with self._cond:
+            return list(self._jobs.values())
+
+    def shutdown(self) -> None:
+        """Cancel all active jobs and stop the workers once their current games end."""
+        with self._cond:
+            self._shutdown = True
+            for job in list(self._queue):
+                self._finish(job, "cancelled")
+                job.finished.set()
+            self._cond.notify_all()
+
+    def _ensure_workers(self) -> None:
+        while len(self._workers) < self.max_concurrency:
+            worker = threading.Thread(target=self._work, daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _take(self) -> tuple[Job, int | None] | None:
+        """Block until some job has a game to dispatch and claim it. Returns (job, seed), or None on shutdown."""
+        with self._cond:
+            while not self._shutdown:
+                for _ in range(len(self._queue) if self._running < self.max_concurrency else 0):
+                    job = self._queue[0]
+                    self._queue.rotate(-1)
+                    if job.remaining > 0:
+                        job.in_flight += 1
+                        job.status = "running"
+                        self._running += 1
+                        return job, job.take_seed()
+                self._cond.wait()
+            return None
+
+    def _work(self) -> None:
+        while True:
+            taken = self._take()
+            if taken is None:
+                return
+            job, seed = taken
+            try:
+                if self.before_game:
+                    self.before_game(job)
+                result = self.runner.play_checked(job.snakes, seed)
+            except Exception:
+                # Binary could not be run or its output not read; count as invalid so the job aborts instead of hanging
+                result = GameResult(winner=None, turns=0, valid=False)
+            try:
+                self._record(job, result, seed)
+            except Exception:
+                # Archive or progress callback failed; _record has released the game, so keep the worker alive
+                pass
+
+    def _record(self, job: Job, result: GameResult, seed: int | None = None) -> None:
+        finished = False
+        try:
+            with self._cond:
+                try:
+                    if not result.valid and seed is not None:
+                        job.retry_seeds.append(seed)
+                    if self.controller and result.valid:
+                        new_limit = self.controller.observe(result)
+                        if new_limit is not None:
+                            self._set_limit(new_limit)
+                    if not job.active:
+                        return
+                    job.results.record(result)
+                    game_num = job.results.total_games
+                    job.history.append((job.played, game_num if result.valid else None, result.winner, result.turns))
+                    job.played += 1
+
+                    if job.results.total_games >= job.num_games:
+                        self._finish(job, "done")
+                        finished = True
+                    elif any(s.failed for s in job.snakes) or job.results.invalid_games >= job.num_games:
+                        job.results.aborted = True
+                        self._finish(job, "aborted")
+                        finished = True
+                finally:
+                    job.in_flight -= 1
+                    self._running -= 1
+                    self._cond.notify_all()
+
+            if job.archive and result.valid and result.record:
+                job.archive.append(result.record)
+            if job.progress_callback:
+                job.progress_callback(game_num, job.num_games, result, job.results.wins)
+        finally:
+            if finished:
+                self._notify_finished(job)
+
+    def _finish(self, job: Job, status: str) -> None:
+        """Mark job finished and drop it from the queue. Caller holds the lock."""
+        job.status = status
+        if job in self._queue:
+            self._queue.remove(job)
+
+    def _notify_finished(self, job: Job) -> None:
+        if self.on_finish:
+            self.on_finish(job)
+        job.finished.set()
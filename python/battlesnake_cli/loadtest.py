@@ -0,0 +1,161 @@
+"""Capacity load testing of a single snake server."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+from .config import GAME_TIMEOUT, LOADTEST_MAX_CONCURRENCY, LOADTEST_STAGE_SECONDS
+from .models import LoadStage, LoadTestResults, Snake
+from .stats import percentile
+
+# Requests still unanswered after this many timeouts are abandoned and counted at this latency
+ABANDON_FACTOR = 4
+
+
+def _body(points: list[tuple[int, int]]) -> list[dict[str, int]]:
+    return [{"x": x, "y": y} for x, y in points]
+
+
+def _snake_json(snake_id: str, points: list[tuple[int, int]]) -> dict:
+    body = _body(points)
+    return {
+        "id": snake_id,
+        "name": snake_id,
+        "health": 90,
+        "body": body,
+        "head": body[0],
+        "length": len(body),
+        "latency": "0",
+        "shout": "",
+        "customizations": {"color": "#888888", "head": "default", "tail": "default"},
+    }
+
+
+def _game_payload(game_id: str, turn: int) -> bytes:
+    """Build a /start, /move or /end request body for a mid-game position on a standard 11x11 board."""
+    you = _snake_json("you", [(5, 5), (5, 4), (5, 3), (4, 3)])
+    opponent = _snake_json("opponent", [(2, 8), (2, 7), (3, 7)])
+    state = {
+        "game": {
+            "id": game_id,
+            "ruleset": {"name": "standard", "version": "cli", "settings": {"foodSpawnChance": 15, "minimumFood": 1}},
+            "map": "standard",
+            "timeout": GAME_TIMEOUT,
+            "source": "custom",
+        },
+        "turn": turn,
+        "board": {
+            "height": 11,
+            "width": 11,
+            "food": _body([(0, 10), (10, 0), (7, 6)]),
+            "hazards": [],
+            "snakes": [you, opponent],
+        },
+        "you": you,
+    }
+    return json.dumps(state).encode()
+
+
+async def _post(port: int, path: str, body: bytes) -> float:
+    """Send one request to the snake and return its latency in milliseconds."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        header = (
+            f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+        )
+        writer.write(header.encode() + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+    finally:
+        writer.close()
+    parts = status_line.split()
+    if len(parts) < 2 or parts[1] != b"200":
+        raise ValueError(f"unexpected response: {status_line!r}")
+    return (time.perf_counter() - start) * 1000
+
+
+async def _run_stage(port: int, concurrency: int, seconds: float, timeout_ms: int) -> LoadStage:
+    """Keep `concurrency` simulated games sending moves back-to-back for `seconds`.
+
+    Each game is opened with /start and closed with /end like a real one, so snakes that keep per-game
+    state answer its moves normally. Only /move latencies are measured.
+    """
+    latencies: list[float] = []
+    counts = {"timeouts": 0, "errors": 0}
+    abandon_s = timeout_ms * ABANDON_FACTOR / 1000
+    start = time.perf_counter()
+    deadline = start + seconds
+
+    async def send(path: str, body: bytes) -> float | None:
+        """Post body to path. Returns the latency, or None if the request failed."""
+        try:
+            return await asyncio.wait_for(_post(port, path, body), abandon_s)
+        except asyncio.TimeoutError:
+            return timeout_ms * ABANDON_FACTOR
+        except (OSError, ValueError):
+            counts["errors"] += 1
+            await asyncio.sleep(0.05)
+            return None
+
+    async def game(n: int) -> None:
+        game_id = f"loadtest-{concurrency}-{n}"
+        turn = 0
+        await send("/start", _game_payload(game_id, turn))
+        while time.perf_counter() < deadline:
+            latency = await send("/move", _game_payload(game_id, turn))
+            if latency is None:
+                continue
+            latencies.append(latency)
+            if latency > timeout_ms:
+                counts["timeouts"] += 1
+            turn += 1
+        await send("/end", _game_payload(game_id, turn))
+
+    await asyncio.gather(*(game(n) for n in range(concurrency)))
+    return LoadStage(
+        concurrency=concurrency,
+        requests=len(latencies),
+        timeouts=counts["timeouts"],
+        errors=counts["errors"],
+        duration=time.perf_counter() - start,
+        p50_ms=percentile(latencies, 50),
+        p99_ms=percentile(latencies, 99),
+    )
+
+
+async def _ramp(
+    port: int,
+    max_concurrency: int,
+    stage_seconds: float,
+    timeout_ms: int,
+    progress_callback: callable | None,
+) -> LoadTestResults:
+    results = LoadTestResults(stages=[], timeout_ms=timeout_ms)
+    concurrency = 1
+    while True:
+        stage = await _run_stage(port, concurrency, stage_seconds, timeout_ms)
+        results.stages.append(stage)
+        if progress_callback:
+            progress_callback(stage)
+        # Stop at the first saturated stage
+        if stage.saturated_by(timeout_ms) or concurrency >= max_concurrency:
+            break
+        # The last stage runs at max_concurrency itself, even if it is not a power of two
+        concurrency = min(concurrency * 2, max_concurrency)
+    return results
+
+
+def run_load_test(
+    snake: Snake,
+    max_concurrency: int = LOADTEST_MAX_CONCURRENCY,
+    stage_seconds: float = LOADTEST_STAGE_SECONDS,
+    timeout_ms: int = GAME_TIMEOUT,
+    progress_callback: callable | None = None,
+) -> LoadTestResults:
+    """Ramp concurrent games (1, 2, 4, ..., max_concurrency) until requests fail or p99 crosses the timeout."""
+    return asyncio.run(_ramp(snake.port, max_concurrency, stage_seconds, timeout_ms, progress_callback))
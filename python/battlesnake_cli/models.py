@@ -1,7 +1,21 @@
 """Data models for snake and game state."""
 
-from dataclasses import dataclass
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
 from subprocess import Popen
+from typing import TYPE_CHECKING
+
+from .config import JOB_HISTORY_SIZE
+
+if TYPE_CHECKING:
+    from .archive import GameArchive
+    from .proxy import SnakeProxy
 
 
 @dataclass
@@ -11,6 +25,18 @@ class Snake:
     name: str
     proc: Popen
     port: int
+    proxy: SnakeProxy | None = None
+    restarts: int = 0
+    failed: bool = False
+    profile_path: Path | None = None
+    # Slot and start time ("1_20250101-120000"), telling apart builds of the same folder in game records
+    version: str = ""
+
+    @property
+    def url(self) -> str:
+        """URL the engine should call (the proxy if one is attached)."""
+        port = self.proxy.port if self.proxy else self.port
+        return f"http://127.0.0.1:{port}"
 
 
 @dataclass
@@ -19,6 +45,17 @@ class GameResult:
 
     winner: str | None
     turns: int
+    valid: bool = True
+    record: dict | None = None
+    duration: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def turn_latencies(self) -> list[float]:
+        """Move latencies in ms, or the average wall time per turn if the engine did not report them."""
+        if self.latencies:
+            return self.latencies
+        return [self.duration * 1000 / self.turns] if self.turns else []
 
 
 @dataclass
@@ -29,7 +66,122 @@ class TestResults:
     ties: int
     total_games: int
     turns_list: list[int]
+    invalid_games: int = 0
+    aborted: bool = False
+    # (seconds since start, games allowed to run at once) whenever the limit changed
+    concurrency_log: list[tuple[float, int]] = field(default_factory=list)
 
     @property
     def avg_turns(self) -> float:
         return sum(self.turns_list) / len(self.turns_list) if self.turns_list else 0.0
+
+    def record(self, result: GameResult) -> None:
+        """Add a finished game to the tallies."""
+        if not result.valid:
+            self.invalid_games += 1
+            return
+        self.total_games += 1
+        self.turns_list.append(result.turns)
+        if result.winner:
+            self.wins[result.winner] = self.wins.get(result.winner, 0) + 1
+        else:
+            self.ties += 1
+
+
+@dataclass(eq=False)
+class Job:
+    """A test run submitted to the background scheduler."""
+
+    id: int
+    snakes: list[Snake]
+    num_games: int
+    results: TestResults
+    progress_callback: Callable[[int, int, GameResult, dict[str, int]], None] | None = None
+    archive: GameArchive | None = None
+    status: str = "queued"
+    in_flight: int = 0
+    # Latest games as (sequence number, game number or None if invalid, winner, turns), for `job` output
+    history: deque[tuple[int, int | None, str | None, int]] = field(
+        default_factory=lambda: deque(maxlen=JOB_HISTORY_SIZE)
+    )
+    # Games recorded so far, valid or not
+    played: int = 0
+    # Game n of the job is played with seed + n, so rerunning a test replays the same games
+    seed: int | None = None
+    next_seed: int = 0
+    # Seeds of invalid games, replayed before new ones
+    retry_seeds: list[int] = field(default_factory=list)
+    report: list[str] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    finished: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def remaining(self) -> int:
+        """Games still to be dispatched."""
+        return self.num_games - self.results.total_games - self.in_flight
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def take_seed(self) -> int | None:
+        """Seed for the next game to dispatch, or None to let the engine pick a random one."""
+        if self.seed is None:
+            return None
+        if self.retry_seeds:
+            return self.retry_seeds.pop()
+        self.next_seed += 1
+        return self.seed + self.next_seed - 1
+
+
+@dataclass
+class LoadStage:
+    """Latency and throughput measured at one concurrency level."""
+
+    concurrency: int
+    requests: int
+    timeouts: int
+    errors: int
+    duration: float
+    p50_ms: float
+    p99_ms: float
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def saturated_by(self, timeout_ms: int) -> str | None:
+        """Why this stage counts as saturated: "errors" (failed requests or none answered), "latency" (p99
+        over the timeout), or None if it is within capacity."""
+        if self.errors or not self.requests:
+            return "errors"
+        if self.p99_ms > timeout_ms:
+            return "latency"
+        return None
+
+
+@dataclass
+class LoadTestResults:
+    """Results of ramping concurrent /move traffic against one snake."""
+
+    stages: list[LoadStage]
+    timeout_ms: int
+
+    @property
+    def saturation(self) -> int | None:
+        """Highest concurrency reached before the first saturated stage, or None if even 1 was saturated."""
+        best = None
+        for stage in self.stages:
+            if stage.saturated_by(self.timeout_ms):
+                break
+            best = stage.concurrency
+        return best
+
+    @property
+    def limited_by(self) -> str | None:
+        """What saturated the snake ("errors" or "latency"), or None if no tested stage was saturated."""
+        for stage in self.stages:
+            reason = stage.saturated_by(self.timeout_ms)
+            if reason:
+                return reason
+        return None
@@ -0,0 +1,160 @@
+"""Controlling the sampling profiler of Python snakes started with --profile."""
+
+from __future__ import annotations
+
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from .config import PROFILE_INTERVAL_MS
+from .game_runner import wait_listening
+from .models import Snake
+
+SAMPLER_PATH = Path(__file__).with_name("sampler.py")
+
+# How long to wait for a snake to write its samples after being asked to
+DUMP_TIMEOUT = 5.0
+
+
+def read_collapsed(path: Path) -> Counter[str]:
+    """Read a collapsed-stack file into stack -> sample count."""
+    stacks: Counter[str] = Counter()
+    with open(path) as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[stack] += int(count)
+    return stacks
+
+
+def hot_functions(stacks: Counter[str], limit: int = 10) -> list[tuple[str, int, int]]:
+    """Top functions by self samples. Returns (function, self samples, total samples) tuples."""
+    self_samples: Counter[str] = Counter()
+    total_samples: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] += count
+        for frame in set(frames):
+            total_samples[frame] += count
+    return [(func, n, total_samples[func]) for func, n in self_samples.most_common(limit)]
+
+
+@dataclass
+class _Session:
+    """Sampling of one snake, from the first test using it starting to the last one ending."""
+
+    snake: Snake
+    users: int = 0
+    tests: int = 0
+    turns: int = 0
+    # Value of snake.restarts when sampling was last turned on, None while it is off
+    armed: int | None = None
+    restarts: int = 0
+
+
+class SnakeProfiler:
+    """Turns sampling on for profiled snakes while at least one test using them runs.
+
+    begin() and end() bracket a test; arm() is called on a worker thread before each game and turns sampling
+    on once the snake is listening, again after every supervisor restart.
+    """
+
+    def __init__(self):
+        self._sessions: dict[int, _Session] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, snakes: list[Snake]) -> None:
+        """Register a test using snakes. Sampling starts when its first game is dispatched."""
+        with self._lock:
+            for snake in snakes:
+                if snake.profile_path is None:
+                    continue
+                session = self._sessions.setdefault(id(snake), _Session(snake, restarts=snake.restarts))
+                session.users += 1
+
+    def arm(self, snakes: list[Snake]) -> None:
+        """Turn sampling on in profiled snakes that are not sampling yet, or were restarted since."""
+        pending = []
+        with self._lock:
+            for snake in snakes:
+                session = self._sessions.get(id(snake))
+                if session is not None and session.armed != snake.restarts:
+                    # Claimed under the lock so concurrent games do not signal (and clear the samples) twice
+                    session.armed = snake.restarts
+                    pending.append(session)
+
+        for session in pending:
+            # SIGUSR1 would terminate a snake whose sampler has not installed its signal handlers yet
+            if not (wait_listening(session.snake) and _signal(session.snake, signal.SIGUSR1)):
+                with self._lock:
+                    session.armed = None
+
+    def end(self, snakes: list[Snake], turns: int) -> list[str]:
+        """Stop sampling snakes no other test uses, write their profiles and return a report.
+
+        A profile covers every test that used the snake while it was sampled, so time per turn is computed
+        over the turns of all of them.
+        """
+        report = []
+        with self._lock:
+            finished = []
+            for snake in snakes:
+                session = self._sessions.get(id(snake))
+                if session is None:
+                    continue
+                session.users -= 1
+                session.tests += 1
+                session.turns += turns
+                if session.users == 0:
+                    del self._sessions[id(snake)]
+                    finished.append(session)
+
+        for session in finished:
+            snake = session.snake
+            stacks = _collect(snake)
+            if stacks is None:
+                report.append(f"Profile of {snake.name}: snake did not write its samples")
+                continue
+            total = sum(stacks.values())
+            report.append(f"Profile of {snake.name}: {total} samples, written to {snake.profile_path}")
+            if session.tests > 1:
+                report.append(f"    covers {session.tests} overlapping tests ({session.turns} turns)")
+            restarts = snake.restarts - session.restarts
+            if restarts:
+                report.append(
+                    f"    snake restarted {restarts} time(s) while profiled: only samples since the last restart "
+                    "are kept, so time per turn is understated"
+                )
+            if not total:
+                continue
+            per_turn = PROFILE_INTERVAL_MS / session.turns if session.turns else 0.0
+            report.append(f"    {'self ms/turn':>12} {'total ms/turn':>13}  function")
+            for func, self_count, total_count in hot_functions(stacks):
+                report.append(f"    {self_count * per_turn:>12.2f} {total_count * per_turn:>13.2f}  {func}")
+        return report
+
+
+def _signal(snake: Snake, sig: int) -> bool:
+    try:
+        os.kill(snake.proc.pid, sig)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+def _collect(snake: Snake) -> Counter[str] | None:
+    """Ask the snake to write its samples and read them back."""
+    path = snake.profile_path
+    path.unlink(missing_ok=True)
+    if not _signal(snake, signal.SIGUSR2):
+        return None
+    deadline = time.monotonic() + DUMP_TIMEOUT
+    while not path.exists():
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.05)
+    return read_collapsed(path)
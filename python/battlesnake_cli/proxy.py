@@ -0,0 +1,218 @@
+"""Recording and caching HTTP proxy between the battlesnake binary and a snake server."""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# How long to wait for the snake before answering the engine with 502
+UPSTREAM_TIMEOUT = 10.0
+
+
+def state_key(body: bytes) -> bytes | None:
+    """Cache key for a /move request, ignoring fields that differ between otherwise identical states.
+
+    Game and snake IDs are regenerated by the engine for every game and reported latencies vary run to run,
+    so snakes are identified by name and `you` by its position in board.snakes.
+    """
+    try:
+        state = json.loads(body)
+        game = state["game"]
+        board = state["board"]
+        you_id = state["you"]["id"]
+        snakes = [(s["name"], s["health"], s["body"]) for s in board["snakes"]]
+        you_index = next(i for i, s in enumerate(board["snakes"]) if s["id"] == you_id)
+        normalized = [
+            game.get("ruleset"),
+            game.get("map"),
+            game.get("timeout"),
+            state["turn"],
+            board["width"],
+            board["height"],
+            board["food"],
+            board["hazards"],
+            snakes,
+            you_index,
+        ]
+    except (ValueError, KeyError, TypeError, StopIteration):
+        return None
+    return hashlib.sha1(json.dumps(normalized, separators=(",", ":")).encode()).digest()
+
+
+class ResponseCache:
+    """Thread-safe bounded LRU cache of move responses."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _ProxyServer
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self._handle(b"")
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        self._handle(self.rfile.read(length))
+
+    def _handle(self, body: bytes) -> None:
+        proxy = self.server.proxy
+        start = time.perf_counter()
+
+        key = None
+        response = None
+        if proxy.cache is not None and self.command == "POST" and self.path == "/move":
+            key = state_key(body)
+            if key is not None:
+                response = proxy.cache.get(key)
+        cached = response is not None
+
+        if cached:
+            status = 200
+        else:
+            try:
+                status, response = proxy.forward(self.command, self.path, body)
+            except (OSError, http.client.HTTPException):
+                status, response = 502, b""
+            if key is not None and status == 200:
+                proxy.cache.put(key, response)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+        proxy.record(self.path, status, (time.perf_counter() - start) * 1000, cached, body, response)
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+    proxy: SnakeProxy
+
+
+class SnakeProxy:
+    """Local proxy in front of one snake that logs all traffic and can serve repeated moves from a cache."""
+
+    def __init__(self, target_port: int, log_path: Path, cache_size: int = 0):
+        self.target_port = target_port
+        self.log_path = log_path
+        self.cache = ResponseCache(cache_size) if cache_size > 0 else None
+        self._local = threading.local()
+        self._log_lock = threading.Lock()
+        self._log = None
+        self._server: _ProxyServer | None = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1] if self._server else 0
+
+    def start(self) -> None:
+        """Bind to a free local port and serve in a background thread."""
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self._log = open(self.log_path, "a", buffering=1)
+        self._server = _ProxyServer(("127.0.0.1", 0), _ProxyHandler)
+        self._server.proxy = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def forward(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        """Send request to the snake over a per-thread keep-alive connection. Returns (status, body)."""
+        try:
+            return self._request(method, path, body)
+        except ConnectionError:
+            # Stale keep-alive connection (e.g. snake restarted) - reconnect once
+            self._drop_connection()
+            return self._request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            # Timed out or failed mid-response: the snake may still be handling the request, so do not resend it,
+            # and do not reuse a connection that may still receive its late response
+            self._drop_connection()
+            raise
+
+    def _drop_connection(self) -> None:
+        self._local.conn.close()
+        self._local.conn = None
+
+    def _request(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = http.client.HTTPConnection("127.0.0.1", self.target_port, timeout=UPSTREAM_TIMEOUT)
+            self._local.conn = conn
+        headers = {"Content-Type": "application/json"} if body else {}
+        conn.request(method, path, body=body or None, headers=headers)
+        resp = conn.getresponse()
+        return resp.status, resp.read()
+
+    def record(self, path: str, status: int, latency_ms: float, cached: bool, request: bytes, response: bytes) -> None:
+        """Append one exchange to the log as a compact JSON line."""
+        req = _loads(request)
+        if isinstance(req, dict) and isinstance(req.get("you"), dict):
+            # `you` duplicates an entry of board.snakes, keep only its id
+            req["you"] = req["you"].get("id")
+        entry = {
+            "t": round(time.time(), 3),
+            "p": path,
+            "s": status,
+            "ms": round(latency_ms, 2),
+            "c": int(cached),
+            "req": req,
+            "res": _loads(response),
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._log_lock:
+            if self._log is not None:
+                self._log.write(line + "\n")
+
+
+def _loads(data: bytes) -> object:
+    if not data:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return data.decode(errors="replace")
@@ -0,0 +1,105 @@
+"""Sampling profiler wrapper for Python snakes.
+
+Run as `python sampler.py main.py` from the snake folder. The snake runs normally; a background thread
+samples the stacks of all other threads every BSCLI_PROFILE_INTERVAL ms while sampling is on.
+SIGUSR1 clears the samples and turns sampling on, SIGUSR2 turns it off and writes the collapsed stacks
+("frame;frame;frame count" per line) to BSCLI_PROFILE_OUT.
+
+This file is executed as a standalone script inside the snake process, so it must not import the package.
+"""
+
+from __future__ import annotations
+
+import os
+import runpy
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+# Leaf functions of threads that are only waiting for work (server loops, keep-alive reads, locks)
+IDLE_FUNCTIONS = {
+    "select",
+    "poll",
+    "accept",
+    "wait",
+    "_wait_for_tstate_lock",
+    "readinto",
+    "readline",
+    "recv",
+    "recv_into",
+}
+
+
+class Sampler:
+    def __init__(self, out_path: str, interval: float):
+        self.out_path = out_path
+        self.interval = interval
+        self.active = False
+        self.samples: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._labels: dict[object, str] = {}
+        self._root = os.getcwd()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(self._root):
+                filename = os.path.relpath(filename, self._root)
+            else:
+                filename = os.path.basename(filename)
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            if not self.active:
+                continue
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self.samples.update(stacks)
+
+    def start(self, signum=None, frame=None) -> None:
+        with self._lock:
+            self.samples.clear()
+        self.active = True
+
+    def dump(self, signum=None, frame=None) -> None:
+        self.active = False
+        with self._lock:
+            samples = dict(self.samples)
+        tmp_path = self.out_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for stack, count in sorted(samples.items()):
+                f.write(f"{stack} {count}\n")
+        os.replace(tmp_path, self.out_path)
+
+
+def main() -> None:
+    script = sys.argv[1]
+    sampler = Sampler(os.environ["BSCLI_PROFILE_OUT"], float(os.environ.get("BSCLI_PROFILE_INTERVAL", "10")) / 1000)
+    signal.signal(signal.SIGUSR1, sampler.start)
+    signal.signal(signal.SIGUSR2, sampler.dump)
+    threading.Thread(target=sampler.run, daemon=True).start()
+
+    # Make the snake see itself as the main script
+    sys.argv = sys.argv[1:]
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    runpy.run_path(script, run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
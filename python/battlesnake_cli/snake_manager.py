@@ -6,10 +6,23 @@ import os
 import signal
 import subprocess as sp
 import sys
+import threading
+import time
 from pathlib import Path
 
-from .config import BASE_PORT, MAX_SNAKES, SNAKES_DIR
+from .config import (
+    BASE_PORT,
+    LOGS_DIR,
+    MAX_SNAKES,
+    PROFILE_INTERVAL_MS,
+    PROFILES_DIR,
+    PROXY_CACHE_SIZE,
+    SNAKES_DIR,
+    STOP_TIMEOUT,
+)
 from .models import Snake
+from .profiler import SAMPLER_PATH
+from .proxy import SnakeProxy
 
 
 class SnakeManager:
@@ -19,6 +32,9 @@ class SnakeManager:
         self.max_snakes = max_snakes
         self.base_port = base_port
         self._snakes: dict[int, Snake | None] = {i: None for i in range(max_snakes)}
+        # (cmd, cwd, env) used to launch each snake, kept for restarts
+        self._launch: dict[int, tuple[list[str], Path, dict[str, str]]] = {}
+        self._lock = threading.RLock()
 
     def get_snake_folders(self) -> list[str]:
         """Returns list of valid snake folder names."""
@@ -34,8 +50,14 @@ class SnakeManager:
             return "python"
         return None
 
-    def start(self, name: str, index: int) -> Snake | None:
-        """Start a snake at given index. Returns Snake or None on failure."""
+    def start(
+        self, name: str, index: int, proxy: bool = False, deterministic: bool = False, profile: bool = False
+    ) -> Snake | None:
+        """Start a snake at given index. Returns Snake or None on failure.
+
+        With proxy, traffic goes through a recording proxy; deterministic also caches move responses.
+        With profile, a Python snake runs under the sampling profiler (see profiler.py).
+        """
         if index < 0 or index >= self.max_snakes:
             print(f"Error: invalid index (use 1-{self.max_snakes})")
             return None
@@ -50,6 +72,10 @@ class SnakeManager:
             print(f"Error: no main.go or main.py found in {name}")
             return None
 
+        if profile and snake_type != "python":
+            print("Error: --profile is only supported for Python snakes")
+            return None
+
         # Stop existing snake at this index
         if self._snakes[index] is not None:
             old_name = self._snakes[index].name
@@ -59,36 +85,86 @@ class SnakeManager:
         env = os.environ.copy()
         port = self.base_port + index
         env["PORT"] = str(port)
+        started = time.strftime("%Y%m%d-%H%M%S")
 
+        profile_path = None
         if snake_type == "go":
             cmd = ["go", "run", "."]
+        elif profile:
+            PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+            profile_path = PROFILES_DIR / f"{index + 1}_{name}_{started}.collapsed"
+            env["BSCLI_PROFILE_OUT"] = str(profile_path)
+            env["BSCLI_PROFILE_INTERVAL"] = str(PROFILE_INTERVAL_MS)
+            cmd = [sys.executable, str(SAMPLER_PATH), "main.py"]
         else:
             cmd = [sys.executable, "main.py"]
 
-        proc = sp.Popen(
-            cmd, cwd=folder, env=env, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True
-        )
+        proc = self._spawn(cmd, folder, env)
 
-        snake = Snake(name=name, proc=proc, port=port)
-        self._snakes[index] = snake
+        snake = Snake(name=name, proc=proc, port=port, profile_path=profile_path, version=f"{index + 1}_{started}")
+        if proxy or deterministic:
+            log_path = LOGS_DIR / f"{index + 1}_{name}_{started}.jsonl"
+            snake.proxy = SnakeProxy(port, log_path, cache_size=PROXY_CACHE_SIZE if deterministic else 0)
+            snake.proxy.start()
+        with self._lock:
+            self._snakes[index] = snake
+            self._launch[index] = (cmd, folder, env)
         return snake
 
+    def _spawn(self, cmd: list[str], cwd: Path, env: dict[str, str]) -> sp.Popen:
+        return sp.Popen(cmd, cwd=cwd, env=env, stdout=sp.DEVNULL, stderr=sp.DEVNULL, start_new_session=True)
+
+    def restart(self, index: int, snake: Snake) -> bool:
+        """Relaunch a crashed snake in place, keeping its Snake object, port and proxy.
+
+        Does nothing if the snake at index has since been stopped or replaced. Returns True if restarted.
+        """
+        with self._lock:
+            if self._snakes.get(index) is not snake:
+                return False
+            # Clean up anything left in the old process group (e.g. the binary spawned by `go run`)
+            self._terminate(snake.proc, signal.SIGKILL)
+            cmd, cwd, env = self._launch[index]
+            snake.proc = self._spawn(cmd, cwd, env)
+            snake.restarts += 1
+            return True
+
+    def _terminate(self, proc: sp.Popen, sig: int = signal.SIGTERM) -> None:
+        """Signal the whole process group and wait for it to exit, escalating to SIGKILL."""
+        # Kill entire process group (needed for `go run` which spawns child processes)
+        try:
+            os.killpg(proc.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            proc.kill()
+        try:
+            proc.wait(timeout=STOP_TIMEOUT)
+        except sp.TimeoutExpired:
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                proc.kill()
+            proc.wait()
+
     def stop(self, index: int) -> bool:
         """Stop snake at given index. Returns True if stopped."""
         if index < 0 or index >= self.max_snakes:
             return False
 
-        snake = self._snakes[index]
-        if snake is None:
-            return False
+        with self._lock:
+            snake = self._snakes[index]
+            if snake is None:
+                return False
+            # Unregister first so the supervisor doesn't treat the exit as a crash
+            self._snakes[index] = None
+            self._launch.pop(index, None)
+            # Jobs still holding this snake treat it as gone for good
+            snake.failed = True
 
-        # Kill entire process group (needed for `go run` which spawns child processes)
-        try:
-            os.killpg(snake.proc.pid, signal.SIGTERM)
-        except (ProcessLookupError, PermissionError):
-            snake.proc.kill()
+        self._terminate(snake.proc)
+
+        if snake.proxy:
+            snake.proxy.stop()
 
-        self._snakes[index] = None
         return True
 
     def stop_all(self) -> list[tuple[int, str, bool]]:
@@ -110,7 +186,8 @@ class SnakeManager:
 
     def list_active(self) -> list[tuple[int, Snake]]:
         """List all active snakes as (index, snake) tuples."""
-        return [(i, s) for i, s in self._snakes.items() if s is not None]
+        with self._lock:
+            return [(i, s) for i, s in self._snakes.items() if s is not None]
 
     def is_active(self, index: int) -> bool:
         """Check if snake at index is active."""
@@ -0,0 +1,14 @@
+"""Small statistics helpers for latency measurements."""
+
+from __future__ import annotations
+
+import math
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) of values using nearest-rank. Returns 0.0 if empty."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered), max(1, math.ceil(pct / 100 * len(ordered))))
+    return ordered[rank - 1]
@@ -0,0 +1,80 @@
+"""Crash detection and automatic restart of snake processes."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from .config import MAX_RESTARTS, RESTART_BACKOFF, RESTART_BACKOFF_MAX, SUPERVISOR_INTERVAL
+from .models import Snake
+from .snake_manager import SnakeManager
+
+# A snake that stays up this long after a restart is considered healthy again
+STABLE_SECONDS = 60.0
+
+
+class SnakeSupervisor:
+    """Background thread that watches snake processes and restarts crashed ones with exponential backoff.
+
+    After MAX_RESTARTS consecutive crashes a snake is marked failed and left down.
+    """
+
+    def __init__(self, manager: SnakeManager, interval: float = SUPERVISOR_INTERVAL):
+        self.manager = manager
+        self.interval = interval
+        # id(snake) -> (snake, consecutive crashes, time of last (re)start, time of next restart attempt or None)
+        self._state: dict[int, tuple[Snake, int, float, float | None]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def check(self) -> None:
+        """Poll every active snake once, reaping exited processes and restarting when backoff has elapsed."""
+        now = time.monotonic()
+        active = self.manager.list_active()
+        seen = set()
+
+        for index, snake in active:
+            seen.add(id(snake))
+            _, crashes, started, retry_at = self._state.get(id(snake), (snake, 0, now, None))
+
+            if snake.failed or snake.proc.poll() is None:
+                if crashes and now - started > STABLE_SECONDS:
+                    crashes = 0
+                self._state[id(snake)] = (snake, crashes, started, None)
+                continue
+
+            if retry_at is None:
+                crashes += 1
+                if crashes > MAX_RESTARTS:
+                    snake.failed = True
+                    print(f"\nSnake {index + 1} : {snake.name} crashed {crashes} times in a row, giving up")
+                    self._state[id(snake)] = (snake, crashes, started, None)
+                    continue
+                delay = min(RESTART_BACKOFF * 2 ** (crashes - 1), RESTART_BACKOFF_MAX)
+                print(
+                    f"\nSnake {index + 1} : {snake.name} exited with code {snake.proc.returncode}, "
+                    f"restarting in {delay:.1f}s"
+                )
+                self._state[id(snake)] = (snake, crashes, started, now + delay)
+            elif now >= retry_at:
+                self.manager.restart(index, snake)
+                self._state[id(snake)] = (snake, crashes, now, None)
+
+        # Forget snakes that were stopped or replaced
+        for key in list(self._state):
+            if key not in seen:
+                del self._state[key]